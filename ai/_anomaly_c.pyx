@@ -0,0 +1,61 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+# distutils: extra_compile_args = -O3 -ffp-contract=off
+# =============================================================================
+# OLWSX - OverLab Web ServerX
+# File: ai/_anomaly_c.pyx
+# Role: Final & Stable compiled per-tick kernel for ai/anomaly.py (optional)
+# Philosophy: One version, the most stable version, first and last.
+# -----------------------------------------------------------------------------
+# Responsibilities:
+# - Run one tick of the EWMA/variance recurrence on a typed C struct.
+# - Mirror anomaly._ingest_kernel bit for bit (no FP contraction).
+# - Build in place with: cythonize -i ai/_anomaly_c.pyx
+#   (from the repo root; the .so lands in ai/ and anomaly.py imports it as
+#   ai._anomaly_c or, with ai/ on sys.path, as _anomaly_c)
+# =============================================================================
+
+# Frozen decay factors (must match ai/anomaly.py)
+cdef double ALPHA_LAT = 0.2
+cdef double ALPHA_ERR = 0.2
+cdef double ALPHA_RATE = 0.15
+cdef double ONE_MINUS_ALPHA_LAT = 1 - ALPHA_LAT
+
+cdef struct State:
+    double ewma_lat_p50
+    double ewma_lat_p90
+    double ewma_err
+    double ewma_rate
+    double var_lat_p50
+    double var_lat_p90
+
+cdef inline void _tick(State* s, double x50, double x90, double xerr, double xrate,
+                       bint first, double* d50, double* d90) noexcept nogil:
+    cdef double g50, g90
+    if first:
+        s.ewma_lat_p50 = x50
+        s.ewma_lat_p90 = x90
+        s.ewma_err = xerr
+        s.ewma_rate = xrate
+    else:
+        # Exponentially weighted variance (West/Finch) against the previous mean
+        g50 = x50 - s.ewma_lat_p50
+        g90 = x90 - s.ewma_lat_p90
+        s.ewma_lat_p50 += ALPHA_LAT * g50
+        s.ewma_lat_p90 += ALPHA_LAT * g90
+        s.ewma_err += ALPHA_ERR * (xerr - s.ewma_err)
+        s.ewma_rate += ALPHA_RATE * (xrate - s.ewma_rate)
+        s.var_lat_p50 = ONE_MINUS_ALPHA_LAT * (s.var_lat_p50 + ALPHA_LAT * (g50 * g50))
+        s.var_lat_p90 = ONE_MINUS_ALPHA_LAT * (s.var_lat_p90 + ALPHA_LAT * (g90 * g90))
+    d50[0] = x50 - s.ewma_lat_p50
+    d90[0] = x90 - s.ewma_lat_p90
+
+cpdef tuple ingest_kernel(double x50, double x90, double xerr, double xrate,
+                          double e50, double e90, double eerr, double erate,
+                          double v50, double v90, bint first):
+    # Same contract as anomaly._ingest_kernel:
+    # returns (ewma_p50, ewma_p90, ewma_err, ewma_rate, var_p50, var_p90, d50, d90)
+    cdef State s = State(e50, e90, eerr, erate, v50, v90)
+    cdef double d50, d90
+    _tick(&s, x50, x90, xerr, xrate, first, &d50, &d90)
+    return (s.ewma_lat_p50, s.ewma_lat_p90, s.ewma_err, s.ewma_rate,
+            s.var_lat_p50, s.var_lat_p90, d50, d90)
@@ -9,25 +9,80 @@
 # - Ingest live metrics (latency, errors, rate) via push API.
 # - Maintain EWMA and variance online.
 # - Detect spikes, drift, and regime changes deterministically.
-# - Produce explainable alerts with fixed schema.
+# - Produce explainable alerts with fixed schema (dict or packed binary).
+# - Batch ingestion over buffered/replayed ticks (NumPy, optional Numba).
+# - Per-tenant detector banks updated in one vectorized pass.
 # =============================================================================
 
 from dataclasses import dataclass, asdict
-from typing import Dict, Optional, Tuple, List
+from typing import Dict, NamedTuple, Optional, Tuple, List, Union
 import math
+import struct
 import time
 
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; kernels run as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
 # Frozen thresholds and decay factors
 ALPHA_LAT = 0.2         # EWMA decay for latency
 ALPHA_ERR = 0.2         # EWMA decay for error ratio
 ALPHA_RATE = 0.15       # EWMA decay for request rate
+ONE_MINUS_ALPHA_LAT = 1 - ALPHA_LAT
 
 SPIKE_Z = 3.0           # z-score threshold for spikes
+SPIKE_Z_SQ = SPIKE_Z * SPIKE_Z
 DRIFT_PCT = 0.25        # 25% sustained shift indicates drift
 REGIME_MIN_S = 30       # minimum duration to accept regime change
 HYSTERESIS_S = 15       # suppress flip-flop
+HISTORY_LEN = 1024      # typical Detector(history_len=...) when history is wanted
+ALERT_POOL_SIZE = 64    # recycled Alert instances kept for reuse
+
+# Column layout of the (N, 5) array accepted by Detector.ingest_batch
+COL_LAT_P50 = 0
+COL_LAT_P90 = 1
+COL_ERR = 2
+COL_RATE = 3
+COL_BP = 4
+
+# Packed alert record: ts (double), kind (uint8), severity (uint8),
+# reason (64 ASCII bytes, truncated or NUL-padded); big-endian
+ALERT_STRUCT = struct.Struct(">dBB64s")
+_KIND_CODES = {"spike": 0, "drift": 1, "regime": 2}
+_SEVERITY_CODES = {"low": 0, "moderate": 1, "high": 2}
+
+# Row layout of DetectorBank.stats, the packed float32 EWMA/variance array
+_EWMA_P50 = 0
+_EWMA_P90 = 1
+_EWMA_ERR = 2
+_EWMA_RATE = 3
+_VAR_P50 = 4
+_VAR_P90 = 5
+_N_STATS = 6
+
+# History rows, in COL_* order (one contiguous float32 ring per field)
+_HISTORY_FIELDS = ("lat_p50", "lat_p90", "err", "rate", "bp")
+_HISTORY_ROWS = {f: k for k, f in enumerate(_HISTORY_FIELDS)}
+_NO_HISTORY = np.zeros((len(_HISTORY_FIELDS), 0), dtype=np.float32)   # shared, history off
+_NO_HISTORY.flags.writeable = False
 
-@dataclass
+# Regime codes used by the batch path (index into _REGIME_NAMES)
+_REGIME_NAMES = ("low", "normal", "high")
+
+# Regime lookup indexed by rate_band * 3 + lat_band, where a band is
+# 0 below 50, 2 above the high threshold (rate 300, lat_p90 200), 1 otherwise
+_REGIME_CODES = np.array([0, 1, 2,
+                          1, 1, 2,
+                          2, 2, 2], dtype=np.int8)
+_REGIMES = tuple(_REGIME_NAMES[c] for c in _REGIME_CODES)
+
+@dataclass(slots=True, frozen=True)
 class Point:
     ts: float
     latency_ms_p50: float
@@ -36,7 +91,7 @@ class Point:
     req_rate: float         # req/s
     backpressure: float     # 0..1
 
-@dataclass
+@dataclass(slots=True)
 class State:
     ewma_lat_p50: float = 0.0
     ewma_lat_p90: float = 0.0
@@ -47,94 +102,281 @@ class State:
     last_regime: Optional[str] = None
     regime_since: float = 0.0
     last_alert_ts: float = 0.0
+    initialized: bool = False   # first tick seeds the EWMAs
+
+# Fixed per-kind alert metrics
+class SpikeMetrics(NamedTuple):
+    lat_p50: float
+    lat_p90: float
+    ewma_p50: float
+    ewma_p90: float
+    bp: float
+    z: float
+
+class DriftMetrics(NamedTuple):
+    lat_p90: float
+    ewma_p90: float
+    err: float
+    drift_pct: float
+
+class RegimeMetrics(NamedTuple):
+    rate: float
+    lat_p90: float
+
+AlertMetrics = Union[SpikeMetrics, DriftMetrics, RegimeMetrics]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Alert:
     ts: float
     kind: str              # 'spike' | 'drift' | 'regime'
     severity: str          # 'low' | 'moderate' | 'high'
-    reason: str
-    metrics: Dict[str, float]
+    reason: Union[str, Tuple[str, tuple]]   # text, or (fmt, args) formatted on render()
+    metrics: AlertMetrics
 
-class Detector:
-    def __init__(self):
-        self.state = State()
+    def render(self) -> str:
+        # Reason text; deferred (fmt, args) reasons are only formatted on emit
+        r = self.reason
+        if isinstance(r, str):
+            return r
+        return r[0].format(*r[1])
+
+    def to_dict(self) -> Dict:
+        d = asdict(self)
+        d["reason"] = self.render()
+        d["metrics"] = self.metrics._asdict()
+        return d
+
+    def pack_into(self, buf, offset: int) -> int:
+        # Serialize as one ALERT_STRUCT record into a writable buffer
+        # (bytearray/memoryview); returns the offset just past the record
+        ALERT_STRUCT.pack_into(buf, offset, self.ts, _KIND_CODES[self.kind],
+                               _SEVERITY_CODES[self.severity],
+                               self.render().encode("ascii", "replace"))
+        return offset + ALERT_STRUCT.size
+
+# Alert object pool. _alert() reuses a pooled instance when one is free;
+# consumers hand alerts back with release_alert() once they are serialized.
+# A released alert is refilled in place despite frozen=True: do not keep a
+# reference to it, and do not hash it (set/dict key) if it may be released.
+_ALERT_POOL: List[Alert] = [Alert.__new__(Alert) for _ in range(ALERT_POOL_SIZE)]
+_POOLED_IDS = {id(a) for a in _ALERT_POOL}   # identity of the instances in _ALERT_POOL
+
+def release_alert(a: Alert) -> None:
+    # Return a consumed alert to the pool; it must not be used afterwards.
+    # Releasing it again is a no-op. Membership is by identity: pooled slots may
+    # be unfilled, so `in` on the list (and its __eq__) cannot be used.
+    i = id(a)
+    if len(_ALERT_POOL) < ALERT_POOL_SIZE and i not in _POOLED_IDS:
+        _POOLED_IDS.add(i)
+        _ALERT_POOL.append(a)
+
+def _spike_mask(d50: np.ndarray, d90: np.ndarray, var50: np.ndarray, var90: np.ndarray,
+                bp: np.ndarray) -> np.ndarray:
+    # Vectorized spike test on squared deviations (var already floored at 1e-6):
+    # z >= SPIKE_Z <=> d > 0 and d*d >= SPIKE_Z_SQ * var, no sqrt or division
+    return (((d50 > 0.0) & (d50 * d50 >= SPIKE_Z_SQ * var50))
+            | ((d90 > 0.0) & (d90 * d90 >= SPIKE_Z_SQ * var90))
+            | (bp >= 0.8))
+
+def _spike_z(d50: float, d90: float, var50: float, var90: float) -> float:
+    # Rare path: the reported z, only computed once a spike alert fires
+    return max(d50 / math.sqrt(var50), d90 / math.sqrt(var90))
+
+def _spike_alert(ts: float, lat_p50: float, lat_p90: float, ewma_p50: float, ewma_p90: float,
+                 bp: float, z: float) -> Alert:
+    return _alert(
+        ts=ts,
+        kind="spike",
+        severity="high" if z >= 4.0 or bp >= 0.9 else "moderate",
+        reason=("latency z={:.2f}, backpressure={:.2f}", (z, bp)),
+        metrics=SpikeMetrics(lat_p50, lat_p90, ewma_p50, ewma_p90, bp, z)
+    )
+
+def _drift_alert(ts: float, lat_p90: float, ewma_p90: float, err: float, drift_ratio: float) -> Alert:
+    return _alert(
+        ts=ts,
+        kind="drift",
+        severity="moderate",
+        reason=("latency drift {:.1f}% with err={:.3f}", (drift_ratio * 100, err)),
+        metrics=DriftMetrics(lat_p90, ewma_p90, err, drift_ratio)
+    )
+
+def _regime_alert(ts: float, regime: str, rate: float, lat_p90: float) -> Alert:
+    return _alert(
+        ts=ts,
+        kind="regime",
+        severity="low",
+        reason=("regime -> {}", (regime,)),
+        metrics=RegimeMetrics(rate, lat_p90)
+    )
 
-    def _ewma(self, x: float, m: float, a: float) -> float:
-        if m == 0.0:
-            return x
-        return a * x + (1 - a) * m
+def _alert(ts: float, kind: str, severity: str, reason: Tuple[str, tuple],
+           metrics: AlertMetrics) -> Alert:
+    try:
+        a = _ALERT_POOL.pop()
+        _POOLED_IDS.discard(id(a))
+    except IndexError:
+        a = Alert.__new__(Alert)
+    # Alert is frozen; fill the recycled slots directly
+    object.__setattr__(a, "ts", ts)
+    object.__setattr__(a, "kind", kind)
+    object.__setattr__(a, "severity", severity)
+    object.__setattr__(a, "reason", reason)
+    object.__setattr__(a, "metrics", metrics)
+    return a
 
-    def _update_var(self, x: float, mean: float, var: float, a: float) -> float:
-        # Exponential variance update (approximate)
-        diff = x - mean
-        return a * (diff * diff) + (1 - a) * var
+# Never called through the Numba dispatcher with caller-supplied values:
+# Detector.ingest runs the plain function (or the Cython build) per tick, and
+# the compiled version only runs inside _batch_kernel on the float64 array
+# ingest_batch coerces. Int fields in a Point or a JSON payload therefore
+# never compile a new specialization mid-stream.
+@njit(cache=True)
+def _ingest_kernel(x50, x90, xerr, xrate, e50, e90, eerr, erate, v50, v90, first):
+    # One tick of the EWMA/variance recurrence plus latency deviations from the
+    # new means; `first` seeds the EWMAs with the tick itself.
+    # Returns (ewma_p50, ewma_p90, ewma_err, ewma_rate, var_p50, var_p90, d50, d90).
+    if first:
+        e50, e90, eerr, erate = x50, x90, xerr, xrate
+    else:
+        # Exponentially weighted variance (West/Finch): the deviation is taken
+        # against the previous mean, before it absorbs this tick
+        g50 = x50 - e50
+        g90 = x90 - e90
+        e50 += ALPHA_LAT * g50
+        e90 += ALPHA_LAT * g90
+        eerr += ALPHA_ERR * (xerr - eerr)
+        erate += ALPHA_RATE * (xrate - erate)
+        v50 = ONE_MINUS_ALPHA_LAT * (v50 + ALPHA_LAT * (g50 * g50))
+        v90 = ONE_MINUS_ALPHA_LAT * (v90 + ALPHA_LAT * (g90 * g90))
+    d50 = x50 - e50
+    d90 = x90 - e90
+    return e50, e90, eerr, erate, v50, v90, d50, d90
+
+# Per-tick kernel used by Detector.ingest: the compiled Cython build of the same
+# recurrence when present (cythonize -i ai/_anomaly_c.pyx), found next to this
+# module whether it is imported as ai.anomaly or run with ai/ on sys.path.
+# Otherwise the plain Python function, since Numba's argument dispatch costs
+# more than one tick.
+try:
+    from ._anomaly_c import ingest_kernel as _tick_kernel
+except ImportError:
+    try:
+        from _anomaly_c import ingest_kernel as _tick_kernel
+    except ImportError:
+        _tick_kernel = getattr(_ingest_kernel, "py_func", _ingest_kernel)
+
+@njit(cache=True)
+def _batch_kernel(pts, st, first):
+    # EWMA/variance recurrence over a float64 batch; st = (ewma_p50, ewma_p90,
+    # ewma_err, ewma_rate, var_p50, var_p90) is read as the prior state and
+    # updated in place. `first` marks a detector that has not seen a tick yet.
+    n = pts.shape[0]
+    out = np.empty((n, _N_STATS))
+    e50, e90, eerr, erate, v50, v90 = st[0], st[1], st[2], st[3], st[4], st[5]
+    for i in range(n):
+        e50, e90, eerr, erate, v50, v90, _, _ = _ingest_kernel(
+            pts[i, 0], pts[i, 1], pts[i, 2], pts[i, 3],
+            e50, e90, eerr, erate, v50, v90, first and i == 0)
+        out[i, 0] = e50
+        out[i, 1] = e90
+        out[i, 2] = eerr
+        out[i, 3] = erate
+        out[i, 4] = v50
+        out[i, 5] = v90
+    st[0], st[1], st[2], st[3], st[4], st[5] = e50, e90, eerr, erate, v50, v90
+    return out
+
+@njit(cache=True)
+def _regime_scan(codes, ts, st):
+    # Regime state machine over a batch; st = (last_code, regime_since,
+    # last_alert_ts) with last_code -1 for "no regime yet", updated in place.
+    n = codes.shape[0]
+    fire = np.zeros(n, dtype=np.bool_)
+    last, since, last_alert = st[0], st[1], st[2]
+    for i in range(n):
+        now = ts[i]
+        if codes[i] != last:
+            if since == 0.0:
+                since = now
+            elif now - since >= REGIME_MIN_S:
+                if now - last_alert >= HYSTERESIS_S:
+                    fire[i] = True
+                    last = codes[i]
+                    last_alert = now
+                    since = 0.0
+        else:
+            since = 0.0
+    st[0], st[1], st[2] = last, since, last_alert
+    return fire
+
+class Detector:
+    def __init__(self, history_len: int = 0):
+        if history_len < 0:
+            raise ValueError("history_len must be >= 0")
+        self.state = State()
+        # Optional structure-of-arrays history ring of history_len ticks, one row
+        # per _HISTORY_FIELDS entry; _head is the next write slot. Off by default:
+        # no buffer is allocated and ticks are not recorded.
+        self._history_len = history_len
+        self._buf = _NO_HISTORY
+        self._rows = None   # per-tick writes, None while history is off
+        if history_len:
+            self._buf = np.zeros((len(_HISTORY_FIELDS), history_len), dtype=np.float32)
+            self._rows = tuple(memoryview(r) for r in self._buf)
+        self._head = 0
+        self._count = 0
 
     def ingest(self, p: Point) -> List[Alert]:
         s = self.state
-        # Update EWMA
-        s.ewma_lat_p50 = self._ewma(p.latency_ms_p50, s.ewma_lat_p50, ALPHA_LAT)
-        s.ewma_lat_p90 = self._ewma(p.latency_ms_p90, s.ewma_lat_p90, ALPHA_LAT)
-        s.ewma_err     = self._ewma(p.error_ratio,     s.ewma_err,     ALPHA_ERR)
-        s.ewma_rate    = self._ewma(p.req_rate,        s.ewma_rate,    ALPHA_RATE)
+        rows = self._rows
+        if rows is not None:
+            h = self._head
+            r50, r90, rerr, rrate, rbp = rows
+            r50[h] = p.latency_ms_p50
+            r90[h] = p.latency_ms_p90
+            rerr[h] = p.error_ratio
+            rrate[h] = p.req_rate
+            rbp[h] = p.backpressure
+            self._head = (h + 1) % self._history_len
+            self._count = min(self._count + 1, self._history_len)
 
-        # Update variance
-        s.var_lat_p50 = self._update_var(p.latency_ms_p50, s.ewma_lat_p50, s.var_lat_p50, ALPHA_LAT)
-        s.var_lat_p90 = self._update_var(p.latency_ms_p90, s.ewma_lat_p90, s.var_lat_p90, ALPHA_LAT)
+        # Update EWMA/variance and latency deviations in one native call
+        e50, e90, eerr, erate, v50, v90, d50, d90 = _tick_kernel(
+            p.latency_ms_p50, p.latency_ms_p90, p.error_ratio, p.req_rate,
+            s.ewma_lat_p50, s.ewma_lat_p90, s.ewma_err, s.ewma_rate,
+            s.var_lat_p50, s.var_lat_p90, not s.initialized)
+        (s.ewma_lat_p50, s.ewma_lat_p90, s.ewma_err, s.ewma_rate,
+         s.var_lat_p50, s.var_lat_p90) = e50, e90, eerr, erate, v50, v90
+        s.initialized = True
 
         alerts: List[Alert] = []
 
-        # Spike detection (z-score)
-        z50 = self._zscore(p.latency_ms_p50, s.ewma_lat_p50, s.var_lat_p50)
-        z90 = self._zscore(p.latency_ms_p90, s.ewma_lat_p90, s.var_lat_p90)
-        if max(z50, z90) >= SPIKE_Z or p.backpressure >= 0.8:
-            alerts.append(self._alert(
-                kind="spike",
-                severity="high" if max(z50, z90) >= 4.0 or p.backpressure >= 0.9 else "moderate",
-                reason=f"latency z={max(z50, z90):.2f}, backpressure={p.backpressure:.2f}",
-                metrics={
-                    "lat_p50": p.latency_ms_p50,
-                    "lat_p90": p.latency_ms_p90,
-                    "ewma_p50": s.ewma_lat_p50,
-                    "ewma_p90": s.ewma_lat_p90,
-                    "bp": p.backpressure,
-                    "z": max(z50, z90)
-                }
-            ))
+        # Spike detection (z-score), compared squared: z >= SPIKE_Z <=> d >= 0 and
+        # d*d >= SPIKE_Z_SQ * var. The actual z is only needed once an alert fires.
+        var50 = max(v50, 1e-6)
+        var90 = max(v90, 1e-6)
+        if ((d50 > 0.0 and d50 * d50 >= SPIKE_Z_SQ * var50)
+                or (d90 > 0.0 and d90 * d90 >= SPIKE_Z_SQ * var90)
+                or p.backpressure >= 0.8):
+            z = _spike_z(d50, d90, var50, var90)
+            alerts.append(_spike_alert(p.ts, p.latency_ms_p50, p.latency_ms_p90, e50, e90,
+                                       p.backpressure, z))
 
         # Drift detection (sustained shift in EWMA vs previous regime mean)
         # We use error ratio as corroboration
-        drift_ratio = self._drift_ratio(p.latency_ms_p90, s.ewma_lat_p90)
-        if drift_ratio >= DRIFT_PCT and s.ewma_err >= 0.05:
-            alerts.append(self._alert(
-                kind="drift",
-                severity="moderate",
-                reason=f"latency drift {drift_ratio*100:.1f}% with err={s.ewma_err:.3f}",
-                metrics={
-                    "lat_p90": p.latency_ms_p90,
-                    "ewma_p90": s.ewma_lat_p90,
-                    "err": s.ewma_err,
-                    "drift_pct": drift_ratio
-                }
-            ))
+        drift_ratio = self._drift_ratio(p.latency_ms_p90, e90)
+        if drift_ratio >= DRIFT_PCT and eerr >= 0.05:
+            alerts.append(_drift_alert(p.ts, p.latency_ms_p90, e90, eerr, drift_ratio))
 
         # Regime change: rate/latency level shift sustained
-        regime = self._regime_label(s.ewma_rate, s.ewma_lat_p90)
+        regime = self._regime_label(erate, e90)
         now = p.ts
         if regime != s.last_regime:
             if s.regime_since == 0.0:
                 s.regime_since = now
             elif now - s.regime_since >= REGIME_MIN_S:
                 if now - s.last_alert_ts >= HYSTERESIS_S:
-                    alerts.append(self._alert(
-                        kind="regime",
-                        severity="low",
-                        reason=f"regime -> {regime}",
-                        metrics={
-                            "rate": s.ewma_rate,
-                            "lat_p90": s.ewma_lat_p90
-                        }
-                    ))
+                    alerts.append(_regime_alert(now, regime, erate, e90))
                     s.last_regime = regime
                     s.last_alert_ts = now
                     s.regime_since = 0.0
@@ -143,9 +385,88 @@ class Detector:
 
         return alerts
 
-    def _zscore(self, x: float, mean: float, var: float) -> float:
-        sd = math.sqrt(max(var, 1e-6))
-        return (x - mean) / sd
+    def ingest_batch(self, points: np.ndarray, ts: np.ndarray) -> List[Alert]:
+        # Buffered/replayed ticks: points is (N, 5) laid out per COL_*, ts the N
+        # event timestamps. Same alerts, same order as N ingest() calls. Rows
+        # stay float64 so metrics match the scalar path; only the history is
+        # kept as float32.
+        # Fixed dtypes: one compiled specialization of each kernel, whatever the input
+        pts = np.ascontiguousarray(points, dtype=np.float64)
+        ts = np.ascontiguousarray(ts, dtype=np.float64)
+        if pts.ndim != 2 or pts.shape[1] != 5 or ts.shape != (pts.shape[0],):
+            raise ValueError("ingest_batch expects points of shape (N, 5) and ts of shape (N,)")
+        s = self.state
+        self._record(pts)
+
+        # EWMA/variance recurrence (sequential, native when Numba is available)
+        st = np.array([s.ewma_lat_p50, s.ewma_lat_p90, s.ewma_err, s.ewma_rate,
+                       s.var_lat_p50, s.var_lat_p90])
+        ew = _batch_kernel(pts, st, not s.initialized)
+        s.initialized = s.initialized or pts.shape[0] > 0
+        (s.ewma_lat_p50, s.ewma_lat_p90, s.ewma_err, s.ewma_rate,
+         s.var_lat_p50, s.var_lat_p90) = (float(v) for v in st)
+        e50, e90, eerr, erate, v50, v90 = ew.T
+        x50 = pts[:, COL_LAT_P50]
+        x90 = pts[:, COL_LAT_P90]
+        bp = pts[:, COL_BP]
+
+        # Spike/drift masks in one vectorized pass (sqrt only for rows that fire)
+        d50 = x50 - e50
+        d90 = x90 - e90
+        var50 = np.maximum(v50, 1e-6)
+        var90 = np.maximum(v90, 1e-6)
+        spike = _spike_mask(d50, d90, var50, var90, bp)
+        drift_ratio = np.zeros_like(e90)
+        np.divide(np.abs(d90), e90, out=drift_ratio, where=e90 > 1e-6)
+        drift = (drift_ratio >= DRIFT_PCT) & (eerr >= 0.05)
+
+        # Regime change
+        band = ((erate >= 50).astype(np.intp) + (erate > 300)) * 3 + (e90 >= 50) + (e90 > 200)
+        codes = _REGIME_CODES[band]
+        last = _REGIME_NAMES.index(s.last_regime) if s.last_regime is not None else -1
+        rst = np.array([last, s.regime_since, s.last_alert_ts], dtype=np.float64)
+        regime = _regime_scan(codes, ts, rst)
+        if rst[0] >= 0:
+            s.last_regime = _REGIME_NAMES[int(rst[0])]
+        s.regime_since = float(rst[1])
+        s.last_alert_ts = float(rst[2])
+
+        alerts: List[Alert] = []
+        for i in np.flatnonzero(spike | drift | regime):
+            if spike[i]:
+                z = _spike_z(float(d50[i]), float(d90[i]), float(var50[i]), float(var90[i]))
+                alerts.append(_spike_alert(float(ts[i]), float(x50[i]), float(x90[i]),
+                                           float(e50[i]), float(e90[i]), float(bp[i]), z))
+            if drift[i]:
+                alerts.append(_drift_alert(float(ts[i]), float(x90[i]), float(e90[i]),
+                                           float(eerr[i]), float(drift_ratio[i])))
+            if regime[i]:
+                alerts.append(_regime_alert(float(ts[i]), _REGIME_NAMES[codes[i]],
+                                            float(erate[i]), float(e90[i])))
+        return alerts
+
+    def history(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        # Last n samples of one field (see _HISTORY_FIELDS), oldest first; empty
+        # when history is off. A view into the ring unless the window wraps.
+        col = self._buf[_HISTORY_ROWS[field]]
+        n = self._count if n is None else min(n, self._count)
+        start = self._head - n
+        if start >= 0:
+            return col[start:self._head]
+        return np.concatenate((col[start:], col[:self._head]))
+
+    def _record(self, pts: np.ndarray) -> None:
+        # Append a batch to the history ring; only the newest history_len rows
+        # survive, written to the slots they would occupy after N single appends
+        size = self._history_len
+        if not size:
+            return
+        n = pts.shape[0]
+        tail = pts[-size:]
+        idx = (self._head + n - tail.shape[0] + np.arange(tail.shape[0])) % size
+        self._buf[:, idx] = tail.T
+        self._head = (self._head + n) % size
+        self._count = min(self._count + n, size)
 
     def _drift_ratio(self, x: float, mean: float) -> float:
         if mean <= 1e-6:
@@ -154,14 +475,92 @@ class Detector:
 
     def _regime_label(self, rate: float, lat_p90: float) -> str:
         # Simple 3-state regime: low/normal/high based on quantized thresholds
-        if rate < 50 and lat_p90 < 50:
-            return "low"
-        if rate > 300 or lat_p90 > 200:
-            return "high"
-        return "normal"
+        return _REGIMES[((rate >= 50) + (rate > 300)) * 3 + (lat_p90 >= 50) + (lat_p90 > 200)]
+
+class DetectorBank:
+    # One detector per tenant in structure-of-arrays layout: each stat is a
+    # contiguous float32 row over all tenants (stats[_EWMA_P50] etc.), so a tick
+    # for many tenants is a handful of vectorized passes instead of N ingest()
+    # calls. Stats are stored as float32 (24 bytes per tenant), so per tenant the
+    # alerts match a Detector fed the same ticks up to that rounding.
+    def __init__(self, n: int):
+        self.stats = np.zeros((_N_STATS, n), dtype=np.float32)
+        self.initialized = np.zeros(n, dtype=bool)
+        self.last_regime = np.full(n, -1, dtype=np.int8)   # index into _REGIME_NAMES
+        self.regime_since = np.zeros(n)
+        self.last_alert_ts = np.zeros(n)
 
-    def _alert(self, kind: str, severity: str, reason: str, metrics: Dict[str, float]) -> Alert:
-        return Alert(ts=time.time(), kind=kind, severity=severity, reason=reason, metrics=metrics)
+    def ingest(self, idx: np.ndarray, lat_p50: np.ndarray, lat_p90: np.ndarray,
+               error_ratio: np.ndarray, req_rate: np.ndarray, backpressure: np.ndarray,
+               ts: np.ndarray) -> List[Tuple[int, Alert]]:
+        # One tick for the tenants in idx (unique within a call, else ValueError);
+        # the other arguments are aligned with idx, ts may be a scalar.
+        # Returns (tenant, alert) pairs.
+        idx = np.asarray(idx, dtype=np.intp)
+        order = np.sort(idx)
+        if (order[1:] == order[:-1]).any():
+            raise ValueError("DetectorBank.ingest expects each tenant at most once per call")
+        x50 = np.asarray(lat_p50, dtype=np.float64)
+        x90 = np.asarray(lat_p90, dtype=np.float64)
+        xerr = np.asarray(error_ratio, dtype=np.float64)
+        xrate = np.asarray(req_rate, dtype=np.float64)
+        bp = np.asarray(backpressure, dtype=np.float64)
+        ts = np.broadcast_to(np.asarray(ts, dtype=np.float64), idx.shape)
+
+        # EWMA/variance (same recurrence as _ingest_kernel, stored as float32)
+        e50, e90, eerr, erate, v50, v90 = self.stats[:, idx].astype(np.float64)
+        first = ~self.initialized[idx]
+        g50 = x50 - e50
+        g90 = x90 - e90
+        st = np.stack((
+            np.where(first, x50, e50 + ALPHA_LAT * g50),
+            np.where(first, x90, e90 + ALPHA_LAT * g90),
+            np.where(first, xerr, eerr + ALPHA_ERR * (xerr - eerr)),
+            np.where(first, xrate, erate + ALPHA_RATE * (xrate - erate)),
+            np.where(first, v50, ONE_MINUS_ALPHA_LAT * (v50 + ALPHA_LAT * (g50 * g50))),
+            np.where(first, v90, ONE_MINUS_ALPHA_LAT * (v90 + ALPHA_LAT * (g90 * g90)))
+        )).astype(np.float32)
+        self.stats[:, idx] = st
+        self.initialized[idx] = True
+        e50, e90, eerr, erate, v50, v90 = st.astype(np.float64)
+
+        # Spike/drift masks (sqrt only for rows that fire)
+        d50 = x50 - e50
+        d90 = x90 - e90
+        var50 = np.maximum(v50, 1e-6)
+        var90 = np.maximum(v90, 1e-6)
+        spike = _spike_mask(d50, d90, var50, var90, bp)
+        drift_ratio = np.zeros_like(e90)
+        np.divide(np.abs(d90), e90, out=drift_ratio, where=e90 > 1e-6)
+        drift = (drift_ratio >= DRIFT_PCT) & (eerr >= 0.05)
+
+        # Regime change, the Detector.ingest state machine as masks
+        band = ((erate >= 50).astype(np.intp) + (erate > 300)) * 3 + (e90 >= 50) + (e90 > 200)
+        codes = _REGIME_CODES[band]
+        last = self.last_regime[idx]
+        since = self.regime_since[idx]
+        last_alert = self.last_alert_ts[idx]
+        changed = codes != last
+        regime = (changed & (since != 0.0) & (ts - since >= REGIME_MIN_S)
+                  & (ts - last_alert >= HYSTERESIS_S))
+        self.regime_since[idx] = np.where(changed & ~regime, np.where(since == 0.0, ts, since), 0.0)
+        self.last_regime[idx] = np.where(regime, codes, last)
+        self.last_alert_ts[idx] = np.where(regime, ts, last_alert)
+
+        alerts: List[Tuple[int, Alert]] = []
+        for i in np.flatnonzero(spike | drift | regime):
+            t = int(idx[i])
+            if spike[i]:
+                z = _spike_z(float(d50[i]), float(d90[i]), float(var50[i]), float(var90[i]))
+                alerts.append((t, _spike_alert(float(ts[i]), float(x50[i]), float(x90[i]),
+                                               float(e50[i]), float(e90[i]), float(bp[i]), z)))
+            if drift[i]:
+                alerts.append((t, _drift_alert(float(ts[i]), float(x90[i]), float(e90[i]),
+                                               float(eerr[i]), float(drift_ratio[i]))))
+            if regime[i]:
+                alerts.append((t, _regime_alert(float(ts[i]), _REGIME_NAMES[codes[i]],
+                                                float(erate[i]), float(e90[i]))))
+        return alerts
 
 # Example usage
 if __name__ == "__main__":
@@ -175,4 +574,5 @@ if __name__ == "__main__":
     for p in pts:
         alerts = det.ingest(p)
         for a in alerts:
-            print(asdict(a))
\ No newline at end of file
+            print(a.to_dict())
+            release_alert(a)
\ No newline at end of file
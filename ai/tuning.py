@@ -10,12 +10,20 @@
 # - Recommend deterministic parameter updates with explainability.
 # - Enforce guardrails (never oscillate aggressively; bounded steps).
 # - Provide canary rollout plan with staged percentages.
+# - Vectorized rule evaluation over historical metrics for backtesting.
 # =============================================================================
 
-from dataclasses import dataclass, asdict
-from typing import Dict, Optional, List
+from dataclasses import dataclass, fields
+from itertools import chain
+from types import MappingProxyType, SimpleNamespace
+from typing import TYPE_CHECKING, Dict, Mapping, Optional, List
 import time
 
+import numpy as np
+
+if TYPE_CHECKING:  # pandas is only needed for Tuner.recommend_batch
+    import pandas as pd
+
 # Frozen bounds
 MAX_RATE_PER_IP = 120     # req/s
 MIN_RATE_PER_IP = 10
@@ -29,6 +37,15 @@ STEP_QUEUE = 50
 STEP_TTL = 30             # seconds
 COOLDOWN_S = 20
 
+# Severity levels in increasing order
+_SEVERITIES = ("low", "moderate", "high")
+
+# Shared read-only "no changes" mapping for Recommendation categories
+_EMPTY = MappingProxyType({})
+
+# Fixed canary stages (percent), shared read-only by every Recommendation
+_ROLLOUT_PLAN = MappingProxyType({"stage1": 10, "stage2": 25, "stage3": 50, "stage4": 100})
+
 @dataclass
 class Metrics:
     ts: float
@@ -38,16 +55,85 @@ class Metrics:
     backpressure: float    # 0..1
     cache_hit_l2: float    # 0..1
 
-@dataclass
+# Rule predicates, the single definition of every tuning threshold. They take
+# a Metrics or a namespace of metric columns: & / | work on Python bools and
+# NumPy arrays alike, so recommend() and recommend_batch() share them.
+def _rate_down(m) -> bool:
+    return (m.backpressure >= 0.8) | (m.err_ratio >= 0.05)
+
+def _rate_up(m) -> bool:
+    return (m.cache_hit_l2 >= 0.7) & (m.lat_p90 < 120) & (m.err_ratio < 0.02)
+
+def _queue_down(m) -> bool:
+    return m.backpressure >= 0.9
+
+def _queue_up(m) -> bool:
+    return (m.err_ratio < 0.01) & (m.lat_p90 < 100)
+
+def _ttl_dynamic_down(m) -> bool:
+    return (m.cache_hit_l2 < 0.3) & (m.lat_p90 > 200)
+
+def _ttl_static_up(m) -> bool:
+    return (m.cache_hit_l2 > 0.8) & (m.err_ratio < 0.02)
+
+@dataclass(slots=True, frozen=True)
 class Recommendation:
     ts: float
-    changes: Dict[str, int]
-    ttl_changes: Dict[str, int]
+    changes: Mapping[str, int]       # _EMPTY when nothing changes
+    ttl_changes: Mapping[str, int]   # _EMPTY when nothing changes
     reason: str
     severity: str          # 'low' | 'moderate' | 'high'
-    rollout: Dict[str, int]  # stages in percent
+    rollout: Mapping[str, int]  # stages in percent
+
+    def to_dict(self) -> Dict:
+        # asdict() cannot deep-copy the read-only rollout mapping
+        return {
+            "ts": self.ts,
+            "changes": dict(self.changes),
+            "ttl_changes": dict(self.ttl_changes),
+            "reason": self.reason,
+            "severity": self.severity,
+            "rollout": dict(self.rollout)
+        }
 
 class Tuner:
+    # Clamp bounds per tunable key
+    _BOUNDS = {
+        "rate_per_ip": (MIN_RATE_PER_IP, MAX_RATE_PER_IP),
+        "queue_depth": (MIN_QUEUE_DEPTH, MAX_QUEUE_DEPTH),
+        "ttl_static_s": (TTL_MIN_S, TTL_MAX_S),
+        "ttl_dynamic_s": (TTL_MIN_S, TTL_MAX_S)
+    }
+
+    # Frozen rule table for recommend_batch, in the order recommend() applies
+    # the same predicates. Groups are evaluated in order and the first matching
+    # rule of a group wins; a later group's severity overrides.
+    # Rule: (predicate, key, step, severity or None, reason).
+    _RULES = (
+        # Rate limit tuning
+        (
+            (_rate_down, "rate_per_ip", -STEP_RATE, "moderate",
+             "reduce rate_per_ip due to backpressure/err"),
+            (_rate_up, "rate_per_ip", STEP_RATE, None,
+             "increase rate_per_ip due to healthy cache & latency"),
+        ),
+        # Queue depth tuning
+        (
+            (_queue_down, "queue_depth", -STEP_QUEUE, "high",
+             "reduce queue_depth due to severe backpressure"),
+            (_queue_up, "queue_depth", STEP_QUEUE, None,
+             "increase queue_depth under low error/latency"),
+        ),
+        # TTL tuning (cache): shorten dynamic TTL on an underperforming cache to
+        # avoid stale content, lengthen static TTL on a strong one
+        (
+            (_ttl_dynamic_down, "ttl_dynamic_s", -STEP_TTL, "moderate",
+             "shorten ttl_dynamic due to low L2 hit & high latency"),
+            (_ttl_static_up, "ttl_static_s", STEP_TTL, None,
+             "extend ttl_static due to strong L2 hit & low error"),
+        ),
+    )
+
     def __init__(self):
         self.last_apply_ts = 0.0
         self.state = {
@@ -62,47 +148,48 @@ class Tuner:
         if now - self.last_apply_ts < COOLDOWN_S:
             return None
 
-        changes = {}
-        ttl_changes = {}
+        state = self.state
+        changes = _EMPTY
+        ttl_changes = _EMPTY
         severity = "low"
         reason_parts = []
 
         # Rate limit tuning
-        if m.backpressure >= 0.8 or m.err_ratio >= 0.05:
-            new_rate = max(MIN_RATE_PER_IP, self.state["rate_per_ip"] - STEP_RATE)
-            changes["rate_per_ip"] = new_rate
+        if _rate_down(m):
+            changes = {"rate_per_ip": max(MIN_RATE_PER_IP, state["rate_per_ip"] - STEP_RATE)}
             severity = "moderate"
             reason_parts.append("reduce rate_per_ip due to backpressure/err")
-        elif m.cache_hit_l2 >= 0.7 and m.lat_p90 < 120 and m.err_ratio < 0.02:
-            new_rate = min(MAX_RATE_PER_IP, self.state["rate_per_ip"] + STEP_RATE)
-            changes["rate_per_ip"] = new_rate
+        elif _rate_up(m):
+            changes = {"rate_per_ip": min(MAX_RATE_PER_IP, state["rate_per_ip"] + STEP_RATE)}
             reason_parts.append("increase rate_per_ip due to healthy cache & latency")
 
         # Queue depth tuning
-        if m.backpressure >= 0.9:
-            new_q = max(MIN_QUEUE_DEPTH, self.state["queue_depth"] - STEP_QUEUE)
-            changes["queue_depth"] = new_q
+        new_q = None
+        if _queue_down(m):
+            new_q = max(MIN_QUEUE_DEPTH, state["queue_depth"] - STEP_QUEUE)
             severity = "high"
             reason_parts.append("reduce queue_depth due to severe backpressure")
-        elif m.err_ratio < 0.01 and m.lat_p90 < 100:
-            new_q = min(MAX_QUEUE_DEPTH, self.state["queue_depth"] + STEP_QUEUE)
-            changes["queue_depth"] = new_q
+        elif _queue_up(m):
+            new_q = min(MAX_QUEUE_DEPTH, state["queue_depth"] + STEP_QUEUE)
             reason_parts.append("increase queue_depth under low error/latency")
+        if new_q is not None:
+            # Allocate the dict only once something actually changes
+            if changes is _EMPTY:
+                changes = {}
+            changes["queue_depth"] = new_q
 
         # TTL tuning (cache)
-        if m.cache_hit_l2 < 0.3 and m.lat_p90 > 200:
+        if _ttl_dynamic_down(m):
             # Underperforming cache: shorten TTL for dynamic to avoid stale content
-            new_ttl_dyn = max(TTL_MIN_S, self.state["ttl_dynamic_s"] - STEP_TTL)
-            ttl_changes["ttl_dynamic_s"] = new_ttl_dyn
+            ttl_changes = {"ttl_dynamic_s": max(TTL_MIN_S, state["ttl_dynamic_s"] - STEP_TTL)}
             severity = "moderate"
             reason_parts.append("shorten ttl_dynamic due to low L2 hit & high latency")
-        elif m.cache_hit_l2 > 0.8 and m.err_ratio < 0.02:
+        elif _ttl_static_up(m):
             # Strong cache: lengthen static TTL
-            new_ttl_static = min(TTL_MAX_S, self.state["ttl_static_s"] + STEP_TTL)
-            ttl_changes["ttl_static_s"] = new_ttl_static
+            ttl_changes = {"ttl_static_s": min(TTL_MAX_S, state["ttl_static_s"] + STEP_TTL)}
             reason_parts.append("extend ttl_static due to strong L2 hit & low error")
 
-        if not changes and not ttl_changes:
+        if changes is _EMPTY and ttl_changes is _EMPTY:
             return None
 
         rec = Recommendation(
@@ -115,23 +202,49 @@ class Tuner:
         )
         return rec
 
+    def recommend_batch(self, metrics_df: "pd.DataFrame") -> "pd.DataFrame":
+        # Backtesting: evaluate _RULES over a DataFrame with Metrics columns as
+        # boolean masks in one vectorized pass. Every row is scored against the
+        # current state; cooldown and apply() are not simulated and reasons are
+        # not rendered. Returns ts, the recommended value per tunable (current
+        # value where unchanged), severity, and whether any rule fired.
+        import pandas as pd
+
+        cols = SimpleNamespace(**{f.name: metrics_df[f.name].to_numpy() for f in fields(Metrics)})
+        n = len(metrics_df)
+        values = {k: np.full(n, v) for k, v in self.state.items()}
+        severity = np.zeros(n, dtype=np.intp)   # index into _SEVERITIES
+        changed = np.zeros(n, dtype=bool)
+        for group in self._RULES:
+            taken = np.zeros(n, dtype=bool)
+            for pred, key, step, sev, _ in group:
+                hit = pred(cols) & ~taken
+                lo, hi = self._BOUNDS[key]
+                values[key][hit] = max(lo, min(hi, self.state[key] + step))
+                if sev is not None:
+                    severity[hit] = _SEVERITIES.index(sev)
+                taken |= hit
+            changed |= taken
+
+        return pd.DataFrame({
+            "ts": cols.ts,
+            **values,
+            "severity": np.array(_SEVERITIES)[severity],
+            "changed": changed
+        }, index=metrics_df.index)
+
     def apply(self, rec: Recommendation) -> None:
-        # Deterministic bounded application
-        for k, v in rec.changes.items():
-            if k == "rate_per_ip":
-                self.state[k] = max(MIN_RATE_PER_IP, min(MAX_RATE_PER_IP, v))
-            elif k == "queue_depth":
-                self.state[k] = max(MIN_QUEUE_DEPTH, min(MAX_QUEUE_DEPTH, v))
-        for k, v in rec.ttl_changes.items():
-            if k == "ttl_static_s":
-                self.state[k] = max(TTL_MIN_S, min(TTL_MAX_S, v))
-            elif k == "ttl_dynamic_s":
-                self.state[k] = max(TTL_MIN_S, min(TTL_MAX_S, v))
+        # Deterministic bounded application; unknown keys are ignored
+        for k, v in chain(rec.changes.items(), rec.ttl_changes.items()):
+            bounds = self._BOUNDS.get(k)
+            if bounds is not None:
+                lo, hi = bounds
+                self.state[k] = max(lo, min(hi, v))
         self.last_apply_ts = rec.ts
 
-    def _rollout_plan(self) -> Dict[str, int]:
+    def _rollout_plan(self) -> Mapping[str, int]:
         # Fixed canary stages
-        return {"stage1": 10, "stage2": 25, "stage3": 50, "stage4": 100}
+        return _ROLLOUT_PLAN
 
 # Example usage
 if __name__ == "__main__":
@@ -139,6 +252,6 @@ if __name__ == "__main__":
     m = Metrics(time.time(), lat_p90=230, err_ratio=0.06, req_rate=200, backpressure=0.85, cache_hit_l2=0.25)
     rec = tuner.recommend(m, alerts=[])
     if rec:
-        print(asdict(rec))
+        print(rec.to_dict())
         tuner.apply(rec)
         print(tuner.state)
\ No newline at end of file